@@ -1,128 +1,494 @@
+import glob
+import hashlib
 import os
-import subprocess
+import tempfile
+from contextlib import contextmanager
+import numpy as np
 import pandas as pd
-from pandarallel import pandarallel
+import pyarrow as pa
+import pyarrow.csv as pcsv
+import pyarrow.parquet as pq
 
-# Initialize pandarallel for parallel processing
-pandarallel.initialize()
+try:
+    from numba import njit, prange
+except ImportError:  # Numba is optional; parse_fixed_width falls back to NumPy.
+    njit = None
 
-def process_txt_files(input_folder="input", output_folder="output"):
+try:
+    import fcntl
+except ImportError:  # No file locking on Windows, where gunicorn does not run.
+    fcntl = None
+
+# Define column specifications and names based on documentation.
+COLSPECS = [
+    (0, 2),     # Recordart
+    (2, 4),     # Transaktionsart
+    (4, 6),     # Kanton
+    (6, 16),    # Code Tarif
+    (16, 24),   # Datum gültig ab
+    (24, 33),   # Steuerbares Einkommen ab Fr.
+    (33, 42),   # Tarifschritt in Fr.
+    (42, 43),   # Code Geschlecht
+    (43, 45),   # Anzahl Kinder
+    (45, 54),   # Mindeststeuer in Fr.
+    (54, 59),   # Steuer %-Satz
+    (59, 62)    # Code Status
+]
+COLUMN_NAMES = [
+    'recordart', 'transaktionsart', 'kanton', 'code_tarif',
+    'datum_gueltig_ab', 'steuerbares_einkommen', 'tarifschritt',
+    'code_geschlecht', 'anzahl_kinder', 'mindeststeuer',
+    'steuer_prozent', 'code_status'
+]
+
+# Columns holding only ASCII digits, parsed straight to integers of the given
+# dtype; the smallest type that holds every value of the field's width. The
+# monetary columns are scaled to float afterwards.
+INTEGER_COLUMNS = {
+    'recordart': np.int8,
+    'transaktionsart': np.int8,
+    'datum_gueltig_ab': np.int32,
+    'steuerbares_einkommen': np.int64,
+    'tarifschritt': np.int32,
+    'anzahl_kinder': np.int8,
+    'mindeststeuer': np.int64,
+    'steuer_prozent': np.int64
+}
+
+# Upper bound on taxable income kept for the dashboard.
+INCOME_LIMIT = 30_000
+
+# Rows per Parquet row group; small enough for row-group statistics to
+# let readers skip income ranges they filter out.
+ROW_GROUP_SIZE = 100_000
+
+# Records parsed and written per batch; bounds peak memory for large inputs.
+BATCH_ROWS = 1_000_000
+
+# Parquet codec; zstd gives noticeably smaller files than snappy on the
+# repetitive tariff data and still decodes quickly.
+PARQUET_COMPRESSION = 'zstd'
+
+# Numeric columns plotted in the app.
+PLOT_COLUMNS = ['steuerbares_einkommen', 'steuer_prozent']
+
+# Columns the dashboard uses; the other cleaned fields are not read for it.
+APP_COLUMNS = [
+    'kanton', 'tarif_code', 'kirchensteuer', 'anzahl_kinder',
+    'steuerbares_einkommen', 'steuer_prozent'
+]
+
+# File in the output folder recording the inputs the cleaned data was built from.
+CACHE_KEY_FILE = '.cache_key'
+
+# File in the output folder locked while the cleaned data is rebuilt.
+LOCK_FILE = '.lock'
+
+# Low-cardinality columns, stored as categoricals.
+CATEGORICAL_COLUMNS = {
+    'recordart', 'transaktionsart', 'kanton', 'code_tarif',
+    'code_geschlecht', 'code_status'
+}
+
+# Amounts stored in hundredths (Rappen, or hundredths of a percent).
+MONETARY_COLUMNS = ['steuerbares_einkommen', 'mindeststeuer', 'steuer_prozent']
+
+# Column types for reading cleaned CSV files, so Arrow skips type inference.
+# Low-cardinality text columns are read dictionary-encoded (categorical).
+CSV_COLUMN_TYPES = {
+    **{name: pa.dictionary(pa.int32(), pa.string()) for name in (
+        'kanton', 'code_tarif', 'code_tarif_one', 'code_tarif_two',
+        'kirchensteuer', 'tarif_code', 'code_geschlecht', 'code_status'
+    )},
+    'recordart': pa.int8(),
+    'transaktionsart': pa.int8(),
+    'datum_gueltig_ab': pa.int32(),
+    'steuerbares_einkommen': pa.float64(),
+    'tarifschritt': pa.int32(),
+    'anzahl_kinder': pa.float64(),
+    'mindeststeuer': pa.float64(),
+    'steuer_prozent': pa.float64(),
+    'is_integer': pa.bool_()
+}
+
+NEWLINE = ord('\n')
+
+# Record type (recordart) of the tax rate records; header (00) and footer
+# (99) records are skipped.
+DATA_RECORD_TYPE = b'06'
+
+def read_records(path):
     """
-    Concatenates TXT files, cleans the raw data, and saves a cleaned CSV.
+    Memory-maps a fixed-width TXT file and returns its data records as a
+    (nrows, record_length + 1) uint8 array, line breaks included. Only
+    records of type DATA_RECORD_TYPE are returned.
     """
-    if not os.path.exists(output_folder):
-        os.makedirs(output_folder)
+    buf = np.memmap(path, dtype=np.uint8, mode='r')
+    ends = np.flatnonzero(buf == NEWLINE)
+    # The end of the file also ends the last record if it has no line break.
+    if len(buf) and buf[-1] != NEWLINE:
+        ends = np.append(ends, len(buf))
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    lengths = ends - starts
     
-    combined_file = os.path.join(output_folder, "combined.txt")
-    
-    # Concatenate all TXT files into one file
-    if os.name == 'nt':  # Windows
-        subprocess.run(f'type {input_folder}\\*.txt > {combined_file}', shell=True)
-    else:  # Unix-like systems
-        subprocess.run(f'cat {input_folder}/*.txt > {combined_file}', shell=True)
-    
-    # Define column specifications and names based on documentation.
-    colspecs = [
-        (0, 2),     # Recordart
-        (2, 4),     # Transaktionsart
-        (4, 6),     # Kanton
-        (6, 16),    # Code Tarif
-        (16, 24),   # Datum gültig ab
-        (24, 33),   # Steuerbares Einkommen ab Fr.
-        (33, 42),   # Tarifschritt in Fr.
-        (42, 43),   # Code Geschlecht
-        (43, 45),   # Anzahl Kinder
-        (45, 54),   # Mindeststeuer in Fr.
-        (54, 59),   # Steuer %-Satz
-        (59, 62)    # Code Status
-    ]
-    column_names = [
-        'recordart', 'transaktionsart', 'kanton', 'code_tarif',
-        'datum_gueltig_ab', 'steuerbares_einkommen', 'tarifschritt',
-        'code_geschlecht', 'anzahl_kinder', 'mindeststeuer',
-        'steuer_prozent', 'code_status'
-    ]
-    
-    # Read the fixed-width file.
-    df = pd.read_fwf(
-        combined_file,
-        colspecs=colspecs,
-        names=column_names,
-        skiprows=1,    # Skip header of the first file
-        skipfooter=1,  # Skip footer of the last file
-        engine='python'
+    # Select the data records by their record type field.
+    second = np.minimum(starts + 1, len(buf) - 1)
+    is_data = (
+        (lengths >= len(DATA_RECORD_TYPE))
+        & (buf[starts] == DATA_RECORD_TYPE[0])
+        & (buf[second] == DATA_RECORD_TYPE[1])
     )
+    record_starts = starts[is_data]
+    if not len(record_starts):
+        raise ValueError(f"No data records in '{path}'")
+    record_length = int(lengths[is_data].max())
+    if record_length < COLSPECS[-1][1] or (lengths[is_data] != record_length).any():
+        raise ValueError(f"Unexpected data record lengths in '{path}'")
+    
+    # Records form contiguous runs, normally a single one, that are reshaped
+    # in place; several runs are copied together without an index array.
+    row_length = record_length + 1
+    runs = np.split(record_starts, np.flatnonzero(np.diff(record_starts) != row_length) + 1)
+    blocks = []
+    for run in runs:
+        block = buf[run[0]:run[0] + len(run) * row_length]
+        if len(block) < len(run) * row_length:
+            # The last record of the file has no line break; copy it with one.
+            block = np.append(block, np.uint8(NEWLINE))
+        blocks.append(block.reshape(-1, row_length))
+    return blocks[0] if len(blocks) == 1 else np.concatenate(blocks)
+
+def parse_integers(block):
+    """
+    Converts an (nrows, width) block of ASCII digits to int64. Blanks count as zero.
+    """
+    digits = block.astype(np.int64) - ord('0')
+    digits[(digits < 0) | (digits > 9)] = 0
+    return digits @ (10 ** np.arange(block.shape[1] - 1, -1, -1, dtype=np.int64))
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def parse_integer_fields(records, starts, ends, out):
+        """
+        Parses the digit fields [starts[j], ends[j]) of every record into
+        out[:, j] in a single pass over the records. Blanks count as zero.
+        """
+        for row in prange(records.shape[0]):
+            for col in range(starts.shape[0]):
+                value = 0
+                for pos in range(starts[col], ends[col]):
+                    digit = np.int64(records[row, pos]) - 48
+                    value = value * 10 + (digit if 0 <= digit <= 9 else 0)
+                out[row, col] = value
+else:
+    parse_integer_fields = None
+
+def parse_strings(block):
+    """
+    Converts an (nrows, width) block of ASCII characters to a bytes array.
+    """
+    return np.ascontiguousarray(block).view(f'S{block.shape[1]}').ravel()
+
+def to_categorical(values):
+    """
+    Builds a categorical from a NumPy array. For bytes arrays only the
+    distinct values are decoded to str.
+    """
+    categories, codes = np.unique(values, return_inverse=True)
+    if categories.dtype.kind == 'S':
+        categories = categories.astype(str)
+    return pd.Categorical.from_codes(codes.ravel(), categories=categories)
+
+def parse_fixed_width(records):
+    """
+    Parses fixed-width records into a dict of NumPy column arrays by
+    slicing each column out as a contiguous byte block. Text columns are
+    returned as fixed-width bytes arrays with their space padding stripped.
+    """
+    records = np.asarray(records)[:, :COLSPECS[-1][1]]
+    spans = dict(zip(COLUMN_NAMES, COLSPECS))
+    
+    # With Numba, all digit columns are parsed in one fused kernel.
+    if parse_integer_fields is not None:
+        starts, ends = np.array([spans[name] for name in INTEGER_COLUMNS]).T
+        values = np.empty((len(records), len(INTEGER_COLUMNS)), dtype=np.int64)
+        parse_integer_fields(records, starts, ends, values)
+        integers = dict(zip(INTEGER_COLUMNS, values.T))
+    else:
+        integers = {
+            name: parse_integers(records[:, start:end])
+            for name, (start, end) in spans.items() if name in INTEGER_COLUMNS
+        }
+    
+    columns = {}
+    for name, (start, end) in spans.items():
+        if name in INTEGER_COLUMNS:
+            columns[name] = integers[name].astype(INTEGER_COLUMNS[name])
+        else:
+            columns[name] = np.char.strip(parse_strings(records[:, start:end]))
+    return columns
+
+def save_data(df, base_path, export_csv=False):
+    """
+    Saves a DataFrame as zstd-compressed Parquet (PARQUET_COMPRESSION) and,
+    if requested, also as CSV. Returns the path of the Parquet file.
+    """
+    parquet_file = f"{base_path}.parquet"
+    df.to_parquet(parquet_file, engine='pyarrow', compression=PARQUET_COMPRESSION, index=False,
+                  row_group_size=ROW_GROUP_SIZE)
+    if export_csv:
+        pcsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), f"{base_path}.csv")
+    return parquet_file
+
+def clean_records(records):
+    """
+    Parses a block of fixed-width records and cleans it into a DataFrame.
+    """
+    # Parse the fixed-width records into column arrays.
+    columns = parse_fixed_width(records)
+    
+    # Split 'code_tarif' into individual characters as a zero-copy view.
+    code_tarif = columns['code_tarif']
+    code_tarif_chars = code_tarif.view('S1').reshape(-1, code_tarif.dtype.itemsize)
+    
+    # Convert monetary values to decimals (assuming 2 decimal places) with
+    # a single division over the stacked int64 columns.
+    monetary = np.column_stack([columns[name] for name in MONETARY_COLUMNS]) / 100
+    for i, name in enumerate(MONETARY_COLUMNS):
+        columns[name] = monetary[:, i]
     
-    # Clean whitespace in string columns.
-    for col in df.select_dtypes(include=['object']):
-        df[col] = df[col].str.strip()
+    data = {
+        name: to_categorical(values) if name in CATEGORICAL_COLUMNS else values
+        for name, values in columns.items()
+    }
     
     # Split 'code_tarif' into individual components.
-    df['code_tarif_one'] = df['code_tarif'].str[0]
-    df['code_tarif_two'] = df['code_tarif'].str[1]
-    df['kirchensteuer'] = df['code_tarif'].str[2]
+    data['code_tarif_one'] = to_categorical(code_tarif_chars[:, 0])
+    data['code_tarif_two'] = to_categorical(code_tarif_chars[:, 1])
+    data['kirchensteuer'] = to_categorical(code_tarif_chars[:, 2])
     
     # Determine if the second character is numeric.
-    numeric_values = pd.to_numeric(df['code_tarif_two'], errors='coerce')
-    df['is_integer'] = numeric_values.notna()
+    second_char = code_tarif_chars[:, 1].view(np.uint8)
+    is_integer = (second_char >= ord('0')) & (second_char <= ord('9'))
+    data['is_integer'] = is_integer
     
     # Create a combined 'tarif_code' based on conversion success.
-    df['tarif_code'] = df.parallel_apply(
-        lambda row: row['code_tarif_one'] + row['code_tarif_two']
-                    if not row['is_integer'] else row['code_tarif_one'],
-        axis=1
-    )
+    data['tarif_code'] = to_categorical(np.where(
+        is_integer,
+        code_tarif_chars[:, 0],
+        np.char.add(code_tarif_chars[:, 0], code_tarif_chars[:, 1])
+    ))
+    
+    # Build the DataFrame once from the already typed arrays.
+    df = pd.DataFrame(data)
+    
+    # Sort by income so the Parquet row-group statistics are tight enough
+    # for income filters to skip whole row groups.
+    return df.sort_values('steuerbares_einkommen', kind='stable', ignore_index=True)
+
+def arrow_schema(table):
+    """
+    Returns the schema of a table with dictionary indices widened to int32,
+    so batches with differently sized dictionaries share one schema.
+    """
+    return pa.schema([
+        field.with_type(pa.dictionary(pa.int32(), field.type.value_type))
+        if pa.types.is_dictionary(field.type) else field
+        for field in table.schema
+    ], metadata=table.schema.metadata)
+
+def input_cache_key(input_folder="input"):
+    """
+    Returns a SHA-256 digest over the name, size and modification time of
+    every TXT file in the input folder, or None if there are none.
+    """
+    paths = sorted(glob.glob(os.path.join(input_folder, '*.txt')))
+    if not paths:
+        return None
+    digest = hashlib.sha256()
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{os.path.basename(path)}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+def process_txt_files(input_folder="input", output_folder="output", export_csv=False,
+                      batch_rows=BATCH_ROWS):
+    """
+    Reads all TXT files in batches of at most batch_rows records, cleans
+    each batch and streams it into a Parquet file (and CSV if export_csv
+    is set), so peak memory does not grow with the input size.
+    Returns the path of the Parquet file.
+    """
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+    
+    paths = sorted(glob.glob(os.path.join(input_folder, '*.txt')))
+    if not paths:
+        raise FileNotFoundError(f"No TXT files found in '{input_folder}'")
+    
+    cleaned_file = os.path.join(output_folder, "tar25_cleaned.parquet")
+    csv_file = os.path.join(output_folder, "tar25_cleaned.csv")
+    cache_key_file = os.path.join(output_folder, CACHE_KEY_FILE)
+    
+    # Forget which inputs the current output was built from, so an
+    # interrupted run is redone on the next start.
+    if os.path.exists(cache_key_file):
+        os.remove(cache_key_file)
     
-    # Convert monetary values to decimals (assuming 2 decimal places).
-    df['steuerbares_einkommen'] = df['steuerbares_einkommen'].astype(float) / 100
-    df['mindeststeuer'] = df['mindeststeuer'].astype(float) / 100
-    df['steuer_prozent'] = df['steuer_prozent'].astype(float) / 100
+    # Write to temporary files, unique to this process, that only replace
+    # the outputs once every input has been processed.
+    temp_files = {}
+    for output_file in [cleaned_file, csv_file] if export_csv else [cleaned_file]:
+        fd, temp_files[output_file] = tempfile.mkstemp(
+            dir=output_folder, prefix=f"{os.path.basename(output_file)}.", suffix='.tmp'
+        )
+        os.close(fd)
+    writer = csv_writer = None
+    completed = False
+    try:
+        for path in paths:
+            records = read_records(path)
+            for start in range(0, len(records), batch_rows):
+                df = clean_records(records[start:start + batch_rows])
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                if writer is None:
+                    schema = arrow_schema(table)
+                    writer = pq.ParquetWriter(
+                        temp_files[cleaned_file], schema, compression=PARQUET_COMPRESSION
+                    )
+                    if export_csv:
+                        csv_writer = pcsv.CSVWriter(temp_files[csv_file], schema)
+                table = table.cast(schema)
+                writer.write_table(table, row_group_size=ROW_GROUP_SIZE)
+                if csv_writer is not None:
+                    csv_writer.write_table(table)
+        completed = True
+    finally:
+        if writer is not None:
+            writer.close()
+        if csv_writer is not None:
+            csv_writer.close()
+        if not completed:
+            for temp_file in temp_files.values():
+                if os.path.exists(temp_file):
+                    os.remove(temp_file)
     
-    # Remove the temporary combined file.
-    os.remove(combined_file)
+    # mkstemp creates owner-only files; give the outputs the usual mode.
+    umask = os.umask(0)
+    os.umask(umask)
+    for output_file, temp_file in temp_files.items():
+        os.chmod(temp_file, 0o666 & ~umask)
+        os.replace(temp_file, output_file)
+    
+    # Record which inputs the cleaned file was built from.
+    with open(cache_key_file, 'w') as f:
+        f.write(input_cache_key(input_folder))
     
-    # Save the cleaned DataFrame to CSV.
-    cleaned_file = os.path.join(output_folder, "tar25_cleaned.csv")
-    df.to_csv(cleaned_file, index=False)
     print(f"Data has been cleaned and saved to '{cleaned_file}'")
-    return df
+    return cleaned_file
 
-def load_data(recreate_data=False):
+def stored_cache_key(output_folder="output"):
     """
-    Loads cleaned data from CSV or processes raw TXT files if needed.
+    Returns the cache key of the inputs the cleaned data in the output
+    folder was built from, or None if it is not known.
     """
-    cleaned_file = 'output/tar25_cleaned.csv'
-    if recreate_data or not os.path.exists(cleaned_file):
-        print("Processing TXT files...")
-        df = process_txt_files()
-    else:
+    cache_key_file = os.path.join(output_folder, CACHE_KEY_FILE)
+    if not os.path.exists(cache_key_file):
+        return None
+    with open(cache_key_file) as f:
+        return f.read()
+
+@contextmanager
+def output_lock(output_folder="output"):
+    """
+    Holds an exclusive lock on the output folder, so concurrent processes
+    (e.g. gunicorn workers starting together) rebuild the cleaned data
+    one at a time.
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    with open(os.path.join(output_folder, LOCK_FILE), 'w') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+def load_data(recreate_data=False, max_income=None, columns=None):
+    """
+    Loads cleaned data from Parquet, processing the raw TXT files first if
+    needed or if they changed since the cleaned file was built. Falls back
+    to a cleaned CSV left over from earlier versions.
+    If max_income is given, the Parquet reader skips row groups above it.
+    If columns is given, only those columns are read.
+    """
+    cleaned_file = 'output/tar25_cleaned.parquet'
+    legacy_file = 'output/tar25_cleaned.csv'
+    
+    def needs_processing():
+        # Compare the current inputs against the ones the cleaned file was
+        # built from; without any TXT files the existing output is used as is.
+        cache_key = input_cache_key()
+        inputs_changed = cache_key is not None and cache_key != stored_cache_key()
+        return inputs_changed or not (os.path.exists(cleaned_file) or os.path.exists(legacy_file))
+    
+    if recreate_data or needs_processing():
+        with output_lock():
+            # Check again under the lock, as another process may have
+            # processed the same inputs while this one was waiting.
+            if recreate_data or needs_processing():
+                print("Processing TXT files...")
+                cleaned_file = process_txt_files()
+    elif not os.path.exists(cleaned_file):
         print("Reading from existing CSV file...")
-        df = pd.read_csv(cleaned_file)
-    return df
+        df = pcsv.read_csv(
+            legacy_file,
+            convert_options=pcsv.ConvertOptions(
+                column_types=CSV_COLUMN_TYPES,
+                include_columns=columns or []
+            )
+        ).to_pandas()
+        # Older CSVs were written from read_fwf output with blank child counts.
+        df['anzahl_kinder'] = df['anzahl_kinder'].fillna(0).astype(np.int8)
+        return df
+    else:
+        print("Reading from existing Parquet file...")
+    
+    filters = None if max_income is None else [('steuerbares_einkommen', '<=', max_income)]
+    return pd.read_parquet(cleaned_file, engine='pyarrow', columns=columns, filters=filters)
 
 def transform_data(df):
     """
     Applies any additional transformations to the DataFrame.
     """
     # (Optional) Convert date fields or apply further transformations if needed.
+    
+    # Narrow the plotted columns to float32: single precision resolves the
+    # incomes shown to well under a cent and the rates far beyond what the
+    # plot needs, and it halves the figure data sent to the browser.
+    df[PLOT_COLUMNS] = df[PLOT_COLUMNS].astype(np.float32)
     return df
 
-def filter_data(df):
+def filter_data(df, save=False, export_csv=False):
     """
     Filters the data to include only records with:
       - Taxable income below 30,000 CHF.
-    Also saves the filtered data to CSV.
+    The filtered data is kept in memory only; set save to also write it to
+    Parquet (and CSV if export_csv is set).
     """
-    # Create a copy to avoid SettingWithCopyWarning
-    df_filtered = df[df['steuerbares_einkommen'] <= 30_000].copy()
+    # Column dtypes are set at parse time, so no casts or copies are needed here.
+    df_filtered = df.loc[df['steuerbares_einkommen'] <= INCOME_LIMIT]
     
-    # Ensure 'kanton' column contains only strings
-    df_filtered['kanton'] = df_filtered['kanton'].astype(str)
-    
-    # Fill NaN values in anzahl_kinder with 0 before converting to integer
-    df_filtered['anzahl_kinder'] = df_filtered['anzahl_kinder'].fillna(0).astype(int)
-    
-    output_filtered = 'output/tar25_cleaned_filtered.csv'
-    df_filtered.to_csv(output_filtered, index=False)
-    print(f"Filtered data saved to '{output_filtered}'")
+    if save:
+        output_filtered = save_data(df_filtered, 'output/tar25_cleaned_filtered', export_csv)
+        print(f"Filtered data saved to '{output_filtered}'")
     return df_filtered
+
+def summarize_data(df):
+    """
+    Returns the numbers of children and income range present in the data,
+    so the app can build its controls without rescanning it.
+    """
+    income = df['steuerbares_einkommen'].to_numpy()
+    return {
+        'children': np.unique(df['anzahl_kinder'].to_numpy()).tolist(),
+        'income_min': int(income.min()),
+        'income_max': int(income.max())
+    }
@@ -1,111 +1,101 @@
-import os
-import subprocess
-import pandas as pd
+from types import MappingProxyType
 import numpy as np
-import plotly.graph_objects as go
-from dash import Dash, dcc, html, callback_context
+from dash import Dash, Patch, ctx, dcc, html
+from dash.exceptions import PreventUpdate
 from dash.dependencies import Input, Output, State
+from flask_caching import Cache
 
 # Import modularized components
-from data_processing import process_txt_files, load_data, transform_data, filter_data
-from visualization import create_base_figure
+from data_processing import (
+    load_data, transform_data, filter_data, summarize_data, INCOME_LIMIT,
+    APP_COLUMNS
+)
+from visualization import (
+    create_base_figure, subtitle_texts, COLOR_SCALE, GREY75, GRID_TRACES
+)
 from translations import (
     get_translations, get_tarif_translations, 
     get_kirchensteuer_translations, get_language_region_translations
 )
 
-# Global flag to control data recreation
-RECREATE_DATA = False  # Set to True to reprocess all TXT files, False to use existing CSV
+# Global flag to force data recreation; changed TXT inputs are detected and
+# reprocessed automatically, so this is only needed after changing the parser
+RECREATE_DATA = False  # Set to True to reprocess all TXT files regardless
 
-def create_dash_app(df_filtered):
-    # Canton name mapping
-    canton_names = {
-        'AG': 'Aargau (AG)',
-        'AI': 'Appenzell Innerrhoden (AI)',
-        'AR': 'Appenzell Ausserrhoden (AR)',
-        'BE': 'Bern (BE)',
-        'BL': 'Basel-Landschaft (BL)',
-        'BS': 'Basel-Stadt (BS)',
-        'FR': 'Fribourg (FR)',
-        'GE': 'Geneva (GE)',
-        'GL': 'Glarus (GL)',
-        'GR': 'Graubünden (GR)',
-        'JU': 'Jura (JU)',
-        'LU': 'Luzern (LU)',
-        'NE': 'Neuchâtel (NE)',
-        'NW': 'Nidwalden (NW)',
-        'OW': 'Obwalden (OW)',
-        'SG': 'St. Gallen (SG)',
-        'SH': 'Schaffhausen (SH)',
-        'SO': 'Solothurn (SO)',
-        'SZ': 'Schwyz (SZ)',
-        'TG': 'Thurgau (TG)',
-        'TI': 'Ticino (TI)',
-        'UR': 'Uri (UR)',
-        'VD': 'Vaud (VD)',
-        'VS': 'Valais (VS)',
-        'ZG': 'Zug (ZG)',
-        'ZH': 'Zürich (ZH)'
-    }
-    
-    # Language region mapping
-    language_regions = {
-        'German': ['AG', 'AI', 'AR', 'BE', 'BL', 'BS', 'GL', 'GR', 'LU', 'NW', 'OW', 'SG', 'SH', 'SO', 'SZ', 'TG', 'UR', 'ZG', 'ZH'],
-        'French': ['FR', 'GE', 'JU', 'NE', 'VD', 'VS'],
-        'Italian': ['TI'],
-        'Multilingual': ['BE', 'FR', 'GR', 'VS']  # These cantons appear in multiple regions
-    }
-    
-    # Get translations from the translations module
-    translations = get_translations()
-    tarif_translations = get_tarif_translations()
-    kirchensteuer_translations = get_kirchensteuer_translations()
-    language_region_translations = get_language_region_translations()
-    
-    # Format tarif options with HTML for better display
-    formatted_tarif_options = {
-        'A': 'A - Tarif für alleinstehende Personen',
-        'B': 'B - Tarif für verheiratete Alleinverdiener',
-        'C': 'C - Tarif für verheiratete Doppelverdiener',
-        'D': 'D - Tarif für Personen, denen Beiträge an die AHV zurückerstattet werden',
-        'E': 'E - Tarif für Einkünfte, die im vereinfachten Abrechnungsverfahren besteuert werden',
-        'G': 'G - Tarif für Ersatzeinkünfte, die nicht über die Arbeitgeber ausbezahlt werden',
-        'H': 'H - Tarif für alleinstehende Personen mit Kindern',
-        'L': 'L - Tarif für Grenzgänger aus Deutschland (Tarifcode A)',
-        'M': 'M - Tarif für Grenzgänger aus Deutschland (Tarifcode B)',
-        'N': 'N - Tarif für Grenzgänger aus Deutschland (Tarifcode C)',
-        'P': 'P - Tarif für Grenzgänger aus Deutschland (Tarifcode H)',
-        'Q': 'Q - Tarif für Grenzgänger aus Deutschland (Tarifcode G)'
-    }
+# Maximum number of figures kept in the figure cache
+FIGURE_CACHE_SIZE = 200
 
-    # Plain text versions for the title
-    tarif_options = {
-        'A': 'A - Tarif für alleinstehende Personen',
-        'B': 'B - Tarif für verheiratete Alleinverdiener',
-        'C': 'C - Tarif für verheiratete Doppelverdiener',
-        'D': 'D - Tarif für Personen, denen Beiträge an die AHV zurückerstattet werden',
-        'E': 'E - Tarif für Einkünfte, die im vereinfachten Abrechnungsverfahren besteuert werden',
-        'G': 'G - Tarif für Ersatzeinkünfte, die nicht über die Arbeitgeber ausbezahlt werden',
-        'H': 'H - Tarif für alleinstehende Personen mit Kindern',
-        'L': 'L - Tarif für Grenzgänger aus Deutschland (Tarifcode A)',
-        'M': 'M - Tarif für Grenzgänger aus Deutschland (Tarifcode B)',
-        'N': 'N - Tarif für Grenzgänger aus Deutschland (Tarifcode C)',
-        'P': 'P - Tarif für Grenzgänger aus Deutschland (Tarifcode H)',
-        'Q': 'Q - Tarif für Grenzgänger aus Deutschland (Tarifcode G)'
-    }
-    
-    # Kirchensteuer options
-    kirchensteuer_options = {
-        'N': 'Without Church Tax',
-        'Y': 'With Church Tax'
-    }
-    
-    # Add custom CSS for hover effects
-    app = Dash(__name__, 
-               external_stylesheets=['https://fonts.googleapis.com/css2?family=Open+Sans:wght@400;600&display=swap'])
-    
-    # Custom CSS for hover effects
-    app.index_string = '''
+# Development server settings used by main()
+DEBUG = False
+HOST = '0.0.0.0'
+PORT = 8050
+
+# Canton name mapping
+CANTON_NAMES = MappingProxyType({
+    'AG': 'Aargau (AG)',
+    'AI': 'Appenzell Innerrhoden (AI)',
+    'AR': 'Appenzell Ausserrhoden (AR)',
+    'BE': 'Bern (BE)',
+    'BL': 'Basel-Landschaft (BL)',
+    'BS': 'Basel-Stadt (BS)',
+    'FR': 'Fribourg (FR)',
+    'GE': 'Geneva (GE)',
+    'GL': 'Glarus (GL)',
+    'GR': 'Graubünden (GR)',
+    'JU': 'Jura (JU)',
+    'LU': 'Luzern (LU)',
+    'NE': 'Neuchâtel (NE)',
+    'NW': 'Nidwalden (NW)',
+    'OW': 'Obwalden (OW)',
+    'SG': 'St. Gallen (SG)',
+    'SH': 'Schaffhausen (SH)',
+    'SO': 'Solothurn (SO)',
+    'SZ': 'Schwyz (SZ)',
+    'TG': 'Thurgau (TG)',
+    'TI': 'Ticino (TI)',
+    'UR': 'Uri (UR)',
+    'VD': 'Vaud (VD)',
+    'VS': 'Valais (VS)',
+    'ZG': 'Zug (ZG)',
+    'ZH': 'Zürich (ZH)'
+})
+
+# Canton dropdown options, sorted by the displayed name
+CANTON_OPTIONS = sorted(
+    ({'label': name, 'value': canton} for canton, name in CANTON_NAMES.items()),
+    key=lambda option: option['label']
+)
+
+# Highlight color of each canton, so a canton keeps its color across selections
+CANTON_COLOR = MappingProxyType({
+    canton: COLOR_SCALE[idx % len(COLOR_SCALE)]
+    for idx, canton in enumerate(sorted(CANTON_NAMES))
+})
+
+# Language region mapping
+LANGUAGE_REGIONS = {
+    'German': ['AG', 'AI', 'AR', 'BE', 'BL', 'BS', 'GL', 'GR', 'LU', 'NW', 'OW', 'SG', 'SH', 'SO', 'SZ', 'TG', 'UR', 'ZG', 'ZH'],
+    'French': ['FR', 'GE', 'JU', 'NE', 'VD', 'VS'],
+    'Italian': ['TI'],
+    'Multilingual': ['BE', 'FR', 'GR', 'VS']  # These cantons appear in multiple regions
+}
+
+# Translated dropdown options for each language, built once
+TARIF_OPTIONS_BY_LANG = {
+    language: [{'label': label, 'value': key} for key, label in labels.items()]
+    for language, labels in get_tarif_translations().items()
+}
+KIRCHENSTEUER_OPTIONS_BY_LANG = {
+    language: [{'label': label, 'value': key} for key, label in labels.items()]
+    for language, labels in get_kirchensteuer_translations().items()
+}
+REGION_OPTIONS_BY_LANG = {
+    language: [{'label': labels[region], 'value': region} for region in LANGUAGE_REGIONS]
+    for language, labels in get_language_region_translations().items()
+}
+
+# Custom CSS for hover effects
+INDEX_STRING = '''
     <!DOCTYPE html>
     <html>
         <head>
@@ -229,59 +219,201 @@ def create_dash_app(df_filtered):
         </body>
     </html>
     '''
+
+# Define consistent font style
+FONT_FAMILY = "'Open Sans', Arial, Helvetica, sans-serif"
+FONT_COLOR = '#666666'  # GREY40
+
+# Style shared by all control labels
+LABEL_STYLE = {
+    'marginBottom': '8px',
+    'fontFamily': FONT_FAMILY,
+    'color': 'black',
+    'display': 'block',
+    'whiteSpace': 'nowrap'
+}
+
+# Minimalist dropdown style
+DROPDOWN_STYLE = {
+    'width': '100%',
+    'backgroundColor': 'white',
+    'fontFamily': FONT_FAMILY,
+    'color': FONT_COLOR,
+    'border': '1px solid #e0e0e0',
+    'borderRadius': '4px',
+    'transition': 'border-color 0.3s'
+}
+
+def _labeled(component, label_id, text, margin_bottom='20px'):
+    """
+    Wraps a control in a block with a translatable label above it.
+    """
+    return html.Div([
+        html.Label(id=label_id, children=text, style=LABEL_STYLE),
+        component
+    ], style={'marginBottom': margin_bottom})
+
+def create_dash_app(df_filtered, meta):
+    # Get translations from the translations module
+    translations = get_translations()
+    tarif_translations = get_tarif_translations()
+    kirchensteuer_translations = get_kirchensteuer_translations()
     
-    # Create sorted list of cantons
-    cantons = sorted(df_filtered['kanton'].unique())
+    # Add custom CSS for hover effects
+    app = Dash(__name__, 
+               external_stylesheets=['https://fonts.googleapis.com/css2?family=Open+Sans:wght@400;600&display=swap'],
+               compress=True)
     
-    # Define consistent font style
-    font_family = "'Open Sans', Arial, Helvetica, sans-serif"
-    font_color = '#666666'  # GREY40
+    # In-process cache for built figures, bounded to FIGURE_CACHE_SIZE entries
+    cache = Cache(app.server, config={
+        'CACHE_TYPE': 'SimpleCache',
+        'CACHE_DEFAULT_TIMEOUT': 3600,
+        'CACHE_THRESHOLD': FIGURE_CACHE_SIZE
+    })
     
-    # Minimalist dropdown style
-    dropdown_style = {
-        'width': '100%',
-        'backgroundColor': 'white',
-        'fontFamily': font_family,
-        'color': font_color,
-        'border': '1px solid #e0e0e0',
-        'borderRadius': '4px',
-        'transition': 'border-color 0.3s'
-    }
+    # Custom CSS for hover effects
+    app.index_string = INDEX_STRING
     
-    # Tarif dropdown style with increased height for options
-    tarif_dropdown_style = {
-        'width': '100%',
-        'backgroundColor': 'white',
-        'fontFamily': font_family,
-        'color': font_color,
-        'border': '1px solid #e0e0e0',
-        'borderRadius': '4px',
-        'transition': 'border-color 0.3s'
+    # Precompute the plotted columns for each tariff, church tax and children
+    # combination once as plain arrays, so callbacks look them up instead of
+    # filtering the DataFrame. Rows are sorted by canton and income, the
+    # order create_base_figure groups them in, so figure builds skip sorting.
+    plot_columns = ['kanton', 'steuerbares_einkommen', 'steuer_prozent']
+    slices = {}
+    for key, group in df_filtered.groupby(
+        ['tarif_code', 'kirchensteuer', 'anzahl_kinder'], observed=True, sort=False
+    ):
+        columns = {column: group[column].to_numpy(dtype=str if column == 'kanton' else None) for column in plot_columns}
+        order = np.lexsort((columns['steuerbares_einkommen'], columns['kanton']))
+        slices[key] = {column: values[order] for column, values in columns.items()}
+    
+    # Cantons of each slice in trace order (sorted) and their highlight colors
+    slice_cantons = {key: np.unique(columns['kanton']) for key, columns in slices.items()}
+    slice_colors = {
+        key: np.array([CANTON_COLOR[canton] for canton in cantons])
+        for key, cantons in slice_cantons.items()
     }
     
+    # Figures are cached per selection as plain dicts, so revisiting a
+    # combination skips rebuilding it and cache hits are cheap to unpickle.
+    @cache.memoize()
+    def build_figure(x_min, x_max, kirchensteuer, tarif_code, children, language):
+        # Look up the data for the kirchensteuer, tarif code, and children selection
+        df_filtered_view = slices[(tarif_code, kirchensteuer, children)]
+        
+        # Get translations for the selected language
+        language_translations = translations[language]
+        
+        # Pass translations to create_base_figure
+        fig = create_base_figure(
+            df_filtered_view, 
+            CANTON_NAMES, 
+            x_min, 
+            x_max, 
+            tarif_code, 
+            kirchensteuer, 
+            children,
+            language_translations,
+            CANTON_COLOR
+        )
+        
+        # Get the church tax label for the title
+        church_tax_label = kirchensteuer_translations[language].get(kirchensteuer, '')
+        
+        # Get the tarif code description for the title
+        tarif_label = tarif_translations[language].get(tarif_code, '').split(' - ')[1] if ' - ' in tarif_translations[language].get(tarif_code, '') else tarif_translations[language].get(tarif_code, '')
+        
+        # Update the title to include all parameters and use the correct language
+        fig.update_layout(
+            title=dict(
+                text=f"{language_translations['source_tax_progression']}",
+                x=0.5,
+                font=dict(size=18, color='black', family=FONT_FAMILY, weight='bold')  # Changed to black and bold
+            ),
+            xaxis=dict(
+                title=dict(
+                    text=language_translations['monthly_income'],
+                    font=dict(size=12, color='black', family=FONT_FAMILY, weight='bold')  # Changed to black
+                ),
+                # Let the base figure handle the ticks and grid lines
+            ),
+            yaxis=dict(
+                title=dict(
+                    text=language_translations['tax_rate'],
+                    font=dict(size=12, color='black', family=FONT_FAMILY, weight='bold')  # Changed to black
+                ),
+                # Remove ticksuffix since we're adding % in the base figure
+                ticksuffix=''
+            )
+        )
+        
+        return fig.to_dict()
+    
+    def style_figure(fig, key, selected_cantons):
+        """
+        Applies the highlight styling of the selected cantons to a figure
+        dict of the given slice, in place, and returns it.
+        """
+        # Compute the highlight styling of all cantons at once, in trace order
+        selected = np.isin(slice_cantons[key], selected_cantons or [])
+        colors = slice_colors[key]
+        trace_colors = np.where(selected, colors, GREY75).tolist()
+        line_colors = np.where(selected, colors, 'rgba(191, 191, 191, 0.5)').tolist()
+        label_colors = np.where(selected, colors, '#666666').tolist()  # GREY40
+        selected = selected.tolist()
+        
+        # Color the lines of selected cantons, enable their hover and update
+        # their connecting line and annotation
+        data = fig['data'][GRID_TRACES:]
+        annotations = fig['layout']['annotations']
+        for idx, is_selected in enumerate(selected):
+            data[idx * 2]['line'].update(color=trace_colors[idx], width=2 if is_selected else 1.5)
+            data[idx * 2]['hoverinfo'] = 'all' if is_selected else 'skip'
+            data[idx * 2 + 1]['line'].update(color=line_colors[idx], width=1.5 if is_selected else 1)
+            annotations[idx]['font'].update(
+                color=label_colors[idx],
+                size=12 if is_selected else 10,
+                family=FONT_FAMILY
+            )
+        
+        return fig
+    
+    # Build the figure for the default selection up front, styled like
+    # update_figure does, so update_figure does not need to run on page load
+    default_key = ('A', 'N', 0)
+    initial_figure = (
+        style_figure(build_figure(2000, 10000, 'N', 'A', 0, 'en'), default_key, [])
+        if default_key in slices else {}
+    )
+    
     # Get min and max income values from the data
-    min_income = int(df_filtered['steuerbares_einkommen'].min())
-    max_income = int(df_filtered['steuerbares_einkommen'].max())
+    min_income = meta['income_min']
+    max_income = meta['income_max']
     
     # Add custom CSS styling
     app.layout = html.Div([
         # Store for current language
         dcc.Store(id='current-language', data='en'),  # Default to English
         
+        # Store with the tariff, church tax and children combinations that
+        # have data, as 'tarif|kirchensteuer|children' keys
+        dcc.Store(id='slice-keys', data=['|'.join(map(str, key)) for key in slices]),
+        
+        # Store with the UI translations and translated dropdown options,
+        # used by the clientside callbacks
+        dcc.Store(id='i18n', data={
+            'translations': {language: dict(labels) for language, labels in translations.items()},
+            'tarif': TARIF_OPTIONS_BY_LANG,
+            'kirchensteuer': KIRCHENSTEUER_OPTIONS_BY_LANG,
+            'region': REGION_OPTIONS_BY_LANG
+        }),
+        
         html.Div([
             # Left column for dropdowns and slider
             html.Div([
                 # Language selector
                 html.Div([
-                    html.Label("Language / Sprache / Langue / Lingua:", 
-                        style={
-                            'marginBottom': '8px',
-                            'fontFamily': font_family,
-                            'color': 'black',
-                            'display': 'block',
-                            'whiteSpace': 'nowrap'
-                        }
-                    ),
+                    html.Label("Language / Sprache / Langue / Lingua:", style=LABEL_STYLE),
                     html.Div([
                         html.Img(
                             src='/assets/flag-en.png',
@@ -315,16 +447,7 @@ def create_dash_app(df_filtered):
                 ]),
                 
                 # Income range slider
-                html.Div([
-                    html.Label(id='income-label', children="Select Income Range (CHF):", 
-                        style={
-                            'marginBottom': '8px',
-                            'fontFamily': font_family,
-                            'color': 'black',
-                            'display': 'block',
-                            'whiteSpace': 'nowrap'
-                        }
-                    ),
+                _labeled(
                     dcc.RangeSlider(
                         id='income-slider',
                         min=min_income,
@@ -338,125 +461,82 @@ def create_dash_app(df_filtered):
                         allowCross=False,
                         tooltip={"placement": "bottom", "always_visible": True}
                     ),
-                ], style={'marginBottom': '25px'}),
+                    'income-label',
+                    "Select Income Range (CHF):",
+                    margin_bottom='25px'
+                ),
                 
                 # Tarif code dropdown
-                html.Div([
-                    html.Label(id='tarif-label', children="Select Tarif Code:", 
-                        style={
-                            'marginBottom': '8px',
-                            'fontFamily': font_family,
-                            'color': 'black',
-                            'display': 'block',
-                            'whiteSpace': 'nowrap'
-                        }
-                    ),
+                _labeled(
                     dcc.Dropdown(
                         id='tarif-selector',
-                        options=[
-                            {'label': value, 'value': key} 
-                            for key, value in formatted_tarif_options.items()
-                        ],
+                        options=TARIF_OPTIONS_BY_LANG['en'],
                         value='A',  # Default to tarif A
                         placeholder="Select tarif code...",
-                        style=tarif_dropdown_style,
+                        style=DROPDOWN_STYLE,
                         optionHeight=35,  # Further increase option height
                         clearable=False
-                    )
-                ], style={'marginBottom': '20px'}),
+                    ),
+                    'tarif-label',
+                    "Select Tarif Code:"
+                ),
                 
                 # Kirchensteuer dropdown
-                html.Div([
-                    html.Label(id='church-label', children="Church Tax Option:", 
-                        style={
-                            'marginBottom': '8px',
-                            'fontFamily': font_family,
-                            'color': 'black',
-                            'display': 'block',
-                            'whiteSpace': 'nowrap'
-                        }
-                    ),
+                _labeled(
                     dcc.Dropdown(
                         id='kirchensteuer-selector',
-                        options=[
-                            {'label': value, 'value': key} 
-                            for key, value in kirchensteuer_options.items()
-                        ],
+                        options=KIRCHENSTEUER_OPTIONS_BY_LANG['en'],
                         value='N',  # Default to without church tax
                         placeholder="Select church tax option...",
-                        style=dropdown_style,
-                    )
-                ], style={'marginBottom': '20px'}),
+                        style=DROPDOWN_STYLE,
+                    ),
+                    'church-label',
+                    "Church Tax Option:"
+                ),
                 
                 # Children dropdown
-                html.Div([
-                    html.Label(id='children-label', children="Number of Children:", 
-                        style={
-                            'marginBottom': '8px',
-                            'fontFamily': font_family,
-                            'color': 'black',
-                            'display': 'block',
-                            'whiteSpace': 'nowrap'
-                        }
-                    ),
+                _labeled(
                     dcc.Dropdown(
                         id='children-selector',
                         options=[
                             {'label': f"{i} {'Child' if i == 1 else 'Children'}", 'value': i} 
-                            for i in sorted(df_filtered['anzahl_kinder'].unique())
+                            for i in meta['children']
                         ],
                         value=0,  # Default to 0 children
                         placeholder="Select number of children...",
-                        style=dropdown_style,
-                    )
-                ], style={'marginBottom': '20px'}),
+                        style=DROPDOWN_STYLE,
+                    ),
+                    'children-label',
+                    "Number of Children:"
+                ),
                 
                 # Language region dropdown
-                html.Div([
-                    html.Label(id='region-label', children="Select Language Region:", 
-                        style={
-                            'marginBottom': '8px',
-                            'fontFamily': font_family,
-                            'color': 'black',
-                            'display': 'block',
-                            'whiteSpace': 'nowrap'
-                        }
-                    ),
+                _labeled(
                     dcc.Dropdown(
                         id='region-selector',
-                        options=[
-                            {'label': region, 'value': region} 
-                            for region in language_regions.keys()
-                        ],
+                        options=REGION_OPTIONS_BY_LANG['en'],
                         placeholder="Select language region...",
-                        style=dropdown_style,
-                    )
-                ], style={'marginBottom': '20px'}),
+                        style=DROPDOWN_STYLE,
+                    ),
+                    'region-label',
+                    "Select Language Region:"
+                ),
                 
                 # Canton selector dropdown
-                html.Div([
-                    html.Label(id='canton-label', children="Select Cantons:", 
-                        style={
-                            'marginBottom': '8px',
-                            'fontFamily': font_family,
-                            'color': 'black',
-                            'display': 'block',
-                            'whiteSpace': 'nowrap'
-                        }
-                    ),
+                _labeled(
                     dcc.Dropdown(
                         id='canton-selector',
-                        options=[
-                            {'label': canton_names.get(canton, canton), 'value': canton} 
-                            for canton in cantons
-                        ],
+                        options=CANTON_OPTIONS,
                         multi=True,
                         placeholder="Select cantons...",
-                        style=dropdown_style,
+                        style=DROPDOWN_STYLE,
                         optionHeight=35,
                         maxHeight=200,  # Reduced from 600 to 300 pixels
-                    )
-                ])
+                    ),
+                    'canton-label',
+                    "Select Cantons:",
+                    margin_bottom='0px'
+                )
             ], style={
                 'width': '320px',
                 'padding': '20px',
@@ -472,7 +552,7 @@ def create_dash_app(df_filtered):
             html.Div([
                 dcc.Graph(
                     id='canton-plot',
-                    figure=create_base_figure(df_filtered, canton_names),
+                    figure=initial_figure,
                     style={
                         'height': '100%',  # Fill the height of the container
                         'width': '100%'    # Fill the width of the container
@@ -511,104 +591,71 @@ def create_dash_app(df_filtered):
     ], style={
         'width': '100%',
         'height': '100vh',
-        'fontFamily': font_family,
+        'fontFamily': FONT_FAMILY,
         'display': 'flex',
         'padding': '0',
         'margin': '0'
     })
     
-    # Callback to update language when a flag is clicked
-    @app.callback(
-        Output('current-language', 'data'),
-        [Input('flag-en', 'n_clicks'),
-         Input('flag-de', 'n_clicks'),
-         Input('flag-fr', 'n_clicks'),
-         Input('flag-it', 'n_clicks')],
-        [State('current-language', 'data')]
-    )
-    def update_language(en_clicks, de_clicks, fr_clicks, it_clicks, current_lang):
-        ctx = callback_context
-        if not ctx.triggered:
-            return current_lang
+    # Switching language only picks strings out of the translation store,
+    # so one clientside callback updates the language, flag styling, labels
+    # and dropdown options together without a server round trip.
+    app.clientside_callback(
+        """
+        function(enClicks, deClicks, frClicks, itClicks, currentLang, i18n) {
+            // Flag ids have the form 'flag-<language>'
+            // On page load only the labels are set; leaving the language
+            // store untouched keeps the figure from being rebuilt
+            const triggered = window.dash_clientside.callback_context.triggered;
+            let language = currentLang;
+            let languageUpdate = window.dash_clientside.no_update;
+            if (triggered.length && triggered[0].prop_id !== '.') {
+                language = triggered[0].prop_id.split('.')[0].slice('flag-'.length);
+                languageUpdate = language;
+            }
             
-        button_id = ctx.triggered[0]['prop_id'].split('.')[0]
-        if button_id == 'flag-en':
-            return 'en'
-        elif button_id == 'flag-de':
-            return 'de'
-        elif button_id == 'flag-fr':
-            return 'fr'
-        elif button_id == 'flag-it':
-            return 'it'
-        
-        return current_lang
-    
-    # Callback to update flag styling based on selected language
-    @app.callback(
-        [Output('flag-en', 'className'),
+            const flags = ['en', 'de', 'fr', 'it'].map(
+                lang => lang === language ? 'language-flag active' : 'language-flag'
+            );
+            
+            const labels = i18n.translations[language];
+            
+            return [
+                languageUpdate,
+                ...flags,
+                labels.income_range,
+                labels.tarif_code,
+                labels.church_tax,
+                labels.number_of_children,
+                labels.language_region,
+                labels.select_cantons,
+                i18n.tarif[language],
+                i18n.kirchensteuer[language],
+                i18n.region[language]
+            ];
+        }
+        """,
+        [Output('current-language', 'data'),
+         Output('flag-en', 'className'),
          Output('flag-de', 'className'),
          Output('flag-fr', 'className'),
-         Output('flag-it', 'className')],
-        [Input('current-language', 'data')]
-    )
-    def update_flag_styling(language):
-        base_class = 'language-flag'
-        active_class = 'language-flag active'
-        
-        return [
-            active_class if language == 'en' else base_class,
-            active_class if language == 'de' else base_class,
-            active_class if language == 'fr' else base_class,
-            active_class if language == 'it' else base_class
-        ]
-    
-    # Callback to update UI labels based on selected language
-    @app.callback(
-        [Output('income-label', 'children'),
+         Output('flag-it', 'className'),
+         Output('income-label', 'children'),
          Output('tarif-label', 'children'),
          Output('church-label', 'children'),
          Output('children-label', 'children'),
          Output('region-label', 'children'),
-         Output('canton-label', 'children')],
-        [Input('current-language', 'data')]
-    )
-    def update_ui_labels(language):
-        return [
-            translations[language]['income_range'],
-            translations[language]['tarif_code'],
-            translations[language]['church_tax'],
-            translations[language]['number_of_children'],
-            translations[language]['language_region'],
-            translations[language]['select_cantons']
-        ]
-    
-    # Callback to update dropdown options based on selected language
-    @app.callback(
-        [Output('tarif-selector', 'options'),
+         Output('canton-label', 'children'),
+         Output('tarif-selector', 'options'),
          Output('kirchensteuer-selector', 'options'),
          Output('region-selector', 'options')],
-        [Input('current-language', 'data')]
+        [Input('flag-en', 'n_clicks'),
+         Input('flag-de', 'n_clicks'),
+         Input('flag-fr', 'n_clicks'),
+         Input('flag-it', 'n_clicks')],
+        [State('current-language', 'data'),
+         State('i18n', 'data')]
     )
-    def update_dropdown_options(language):
-        # Update tarif options
-        tarif_options = [
-            {'label': tarif_translations[language][key], 'value': key} 
-            for key in tarif_translations[language].keys()
-        ]
-        
-        # Update kirchensteuer options
-        kirchensteuer_opts = [
-            {'label': kirchensteuer_translations[language][key], 'value': key} 
-            for key in kirchensteuer_translations[language].keys()
-        ]
-        
-        # Update language region options
-        region_options = [
-            {'label': language_region_translations[language][region], 'value': region} 
-            for region in language_regions.keys()
-        ]
-        
-        return tarif_options, kirchensteuer_opts, region_options
     
     @app.callback(
         Output('canton-selector', 'value'),
@@ -619,167 +666,176 @@ def create_dash_app(df_filtered):
             return []
         
         # Return list of cantons in the selected language region
-        return language_regions.get(selected_region, [])
+        return LANGUAGE_REGIONS.get(selected_region, [])
+    
+    # Canton highlighting only toggles trace visibility and colors, so it
+    # runs in the browser on the current figure instead of a server rebuild,
+    # touching only the cantons added to or removed from the selection.
+    app.clientside_callback(
+        """
+        function(selectedCantons, figure) {
+            if (!figure) {
+                return window.dash_clientside.no_update;
+            }
+            const selected = new Set(selectedCantons || []);
+            const data = figure.data.slice();
+            const annotations = (figure.layout.annotations || []).slice();
+            
+            // Canton traces follow the grid lines and carry a legendgroup
+            const first = data.findIndex(trace => trace.legendgroup);
+            if (first < 0) {
+                return window.dash_clientside.no_update;
+            }
+            
+            // Only restyle cantons whose selection changed; a line is
+            // highlighted when it is drawn in its canton color (meta)
+            let changed = false;
+            for (let idx = 0; first + idx * 2 < data.length; idx++) {
+                const trace = first + idx * 2;
+                const line = data[trace];
+                const connector = data[trace + 1];
+                const color = line.meta;
+                const isSelected = selected.has(line.name);
+                if ((line.line.color === color) === isSelected) {
+                    continue;
+                }
+                changed = true;
+                
+                // Recolor the canton line; only highlighted lines take hover
+                data[trace] = {...line, hoverinfo: isSelected ? 'all' : 'skip', line: {
+                    ...line.line,
+                    color: isSelected ? color : 'rgba(191, 191, 191, 0.8)',
+                    width: isSelected ? 2 : 1.5
+                }};
+                
+                // Update connecting line and annotation
+                data[trace + 1] = {...connector, line: {
+                    ...connector.line,
+                    color: isSelected ? color : 'rgba(191, 191, 191, 0.5)',
+                    width: isSelected ? 1.5 : 1
+                }};
+                annotations[idx] = {...annotations[idx], font: {
+                    ...annotations[idx].font,
+                    color: isSelected ? color : '#666666',
+                    size: isSelected ? 12 : 10
+                }};
+            }
+            if (!changed) {
+                return window.dash_clientside.no_update;
+            }
+            return {...figure, data: data, layout: {...figure.layout, annotations: annotations}};
+        }
+        """,
+        Output('canton-plot', 'figure', allow_duplicate=True),
+        Input('canton-selector', 'value'),
+        State('canton-plot', 'figure'),
+        prevent_initial_call=True
+    )
+    
+    # Show a message instead of the plot when the selected combination has
+    # no data, without asking the server
+    app.clientside_callback(
+        """
+        function(kirchensteuer, tarifCode, children, language, sliceKeys, i18n) {
+            if (sliceKeys.includes([tarifCode, kirchensteuer, children].join('|'))) {
+                return window.dash_clientside.no_update;
+            }
+            const labels = i18n.translations[language];
+            const fontFamily = "'Open Sans', Arial, Helvetica, sans-serif";
+            const axisTitle = text => ({
+                text: text,
+                font: {size: 12, color: '#666666', family: fontFamily, weight: 'bold'}
+            });
+            return {
+                data: [],
+                layout: {
+                    plot_bgcolor: 'white',
+                    paper_bgcolor: 'white',
+                    title: {
+                        text: labels.no_data_available,
+                        x: 0.5,
+                        font: {size: 18, color: '#666666', family: fontFamily}
+                    },
+                    xaxis: {title: axisTitle(labels.monthly_income), showgrid: false},
+                    yaxis: {title: axisTitle(labels.tax_rate), ticksuffix: ''}
+                }
+            };
+        }
+        """,
+        Output('canton-plot', 'figure', allow_duplicate=True),
+        [Input('kirchensteuer-selector', 'value'),
+         Input('tarif-selector', 'value'),
+         Input('children-selector', 'value'),
+         Input('current-language', 'data')],
+        [State('slice-keys', 'data'),
+         State('i18n', 'data')],
+        prevent_initial_call='initial_duplicate'
+    )
     
+    # Rebuild the figure only when the plotted data or language changes; the
+    # current canton selection is applied on top of the new figure.
     @app.callback(
         Output('canton-plot', 'figure'),
-        [Input('canton-selector', 'value'),
-         Input('region-selector', 'value'),
-         Input('income-slider', 'value'),
+        [Input('income-slider', 'value'),
          Input('kirchensteuer-selector', 'value'),
          Input('tarif-selector', 'value'),
          Input('children-selector', 'value'),
-         Input('current-language', 'data')]
+         Input('current-language', 'data')],
+        [State('canton-selector', 'value')],
+        prevent_initial_call=True
     )
-    def update_figure(selected_cantons, selected_region, income_range, kirchensteuer, tarif_code, children, language):
+    def update_figure(income_range, kirchensteuer, tarif_code, children, language, selected_cantons):
+        # Combinations without data are rendered clientside
+        key = (tarif_code, kirchensteuer, children)
+        if key not in slices:
+            raise PreventUpdate
+        
         # Unpack the income range
         x_min, x_max = income_range
         
-        # Filter data based on kirchensteuer, tarif code, and children selection
-        df_filtered_view = df_filtered[
-            (df_filtered['kirchensteuer'] == kirchensteuer) & 
-            (df_filtered['tarif_code'] == tarif_code) &
-            (df_filtered['anzahl_kinder'] == children)
-        ]
-        
-        # Check if the filtered data is empty
-        if df_filtered_view.empty:
-            # Create an empty figure with a message
-            fig = go.Figure()
-            fig.update_layout(
-                title=dict(
-                    text=translations[language]['no_data_available'],
-                    x=0.5,
-                    font=dict(size=18, color='#666666', family=font_family)
-                ),
-                xaxis=dict(
-                    title=dict(
-                        text=translations[language]['monthly_income'],
-                        font=dict(size=12, color='#666666', family=font_family, weight='bold')
-                    ),
-                    # Let the base figure handle the ticks to ensure grid alignment
-                    showgrid=False
-                ),
-                yaxis=dict(
-                    title=dict(
-                        text=translations[language]['tax_rate'],
-                        font=dict(size=12, color='#666666', family=font_family, weight='bold')
-                    ),
-                    # Remove ticksuffix since we're adding % in the base figure
-                    ticksuffix=''
-                )
-            )
-            return fig
-        
-        # Get translations for the selected language
-        translations = get_translations()[language]
-        
-        # Pass translations to create_base_figure
-        fig = create_base_figure(
-            df_filtered_view, 
-            canton_names, 
-            income_range[0], 
-            income_range[1], 
-            tarif_code, 
-            kirchensteuer, 
-            children,
-            translations
-        )
-        
-        # Get the church tax label for the title
-        church_tax_label = kirchensteuer_translations[language].get(kirchensteuer, '')
-        
-        # Get the tarif code description for the title
-        tarif_label = tarif_translations[language].get(tarif_code, '').split(' - ')[1] if ' - ' in tarif_translations[language].get(tarif_code, '') else tarif_translations[language].get(tarif_code, '')
-        
-        # Update the title to include all parameters and use the correct language
-        fig.update_layout(
-            title=dict(
-                text=f"{translations['source_tax_progression']}",
-                x=0.5,
-                font=dict(size=18, color='black', family=font_family, weight='bold')  # Changed to black and bold
-            ),
-            xaxis=dict(
-                title=dict(
-                    text=translations['monthly_income'],
-                    font=dict(size=12, color='black', family=font_family, weight='bold')  # Changed to black
-                ),
-                # Let the base figure handle the ticks to ensure grid alignment
-                showgrid=False
-            ),
-            yaxis=dict(
-                title=dict(
-                    text=translations['tax_rate'],
-                    font=dict(size=12, color='black', family=font_family, weight='bold')  # Changed to black
-                ),
-                # Remove ticksuffix since we're adding % in the base figure
-                ticksuffix=''
+        # A language switch leaves the data and highlighting unchanged, so
+        # only the texts of the figure shown are patched
+        if list(ctx.triggered_prop_ids) == ['current-language.data']:
+            language_translations = translations[language]
+            subtitle_text, income_range_text = subtitle_texts(
+                language_translations, x_min, x_max, tarif_code, kirchensteuer, children
             )
-        )
-        
-        # Get the indices of selected cantons
-        cantons = sorted(df_filtered_view['kanton'].unique())
-        canton_to_idx = {canton: idx for idx, canton in enumerate(cantons)}
-        
-        # Color scale for highlighted cantons
-        COLOR_SCALE = [
-            '#9A5CB4', '#3F8EFC', '#906C33', '#7B3A96', '#5D5D5D', 
-            '#3E8E75', '#5EFF5E', '#F0E68C', '#888888', '#4CA64C', 
-            '#A0522D', '#DDA0DD', '#FF00FF', '#000080', '#FFA500', 
-            '#FFC0CB', '#9ACD32', '#FF0000', '#40E0D0', '#48D1CC', 
-            '#8A2BE2', '#C71585', '#FF1493', '#8B0000', '#FFD32C', 
-            '#FF69B4'
-        ]
-        
-        # Update visibility and colors
-        for canton in cantons:
-            if canton not in canton_to_idx:
-                continue
-                
-            idx = canton_to_idx[canton]
-            color_idx = idx % len(COLOR_SCALE)
-            color = COLOR_SCALE[color_idx]
             
-            if canton in selected_cantons:
-                # Show colored line, hide grey line
-                fig.data[idx * 3].visible = False      # Grey line
-                fig.data[idx * 3 + 1].visible = True   # Colored line
-                
-                # Update connecting line color
-                fig.data[idx * 3 + 2].line.color = color
-                fig.data[idx * 3 + 2].line.width = 1.5
-                
-                # Update annotation color and weight
-                fig.layout.annotations[idx].font.color = color
-                fig.layout.annotations[idx].font.size = 12
-                fig.layout.annotations[idx].font.family = font_family
-            else:
-                # Show grey line, hide colored line
-                fig.data[idx * 3].visible = True       # Grey line
-                fig.data[idx * 3 + 1].visible = False  # Colored line
-                
-                # Reset connecting line
-                fig.data[idx * 3 + 2].line.color = 'rgba(191, 191, 191, 0.5)'  # GREY75
-                fig.data[idx * 3 + 2].line.width = 1
-                
-                # Reset annotation
-                fig.layout.annotations[idx].font.color = '#666666'  # GREY40
-                fig.layout.annotations[idx].font.size = 10
-                fig.layout.annotations[idx].font.family = font_family
+            # The subtitle and income range follow the canton annotations
+            num_cantons = len(slice_cantons[key])
+            patch = Patch()
+            patch['layout']['title']['text'] = language_translations['source_tax_progression']
+            patch['layout']['xaxis']['title']['text'] = language_translations['monthly_income']
+            patch['layout']['yaxis']['title']['text'] = language_translations['tax_rate']
+            patch['layout']['annotations'][num_cantons]['text'] = subtitle_text
+            patch['layout']['annotations'][num_cantons + 1]['text'] = income_range_text
+            return patch
         
-        return fig
+        # Work on the plain figure dict, which skips Plotly's validation of
+        # every property set below; the cache returns a fresh copy
+        fig = build_figure(x_min, x_max, kirchensteuer, tarif_code, children, language)
+        
+        return style_figure(fig, key, selected_cantons)
     
     return app
 
-def main():
+def create_app():
+    """
+    Load the data and create the Dash application.
+    """
     # Load and process data.
-    df = load_data(recreate_data=RECREATE_DATA)
+    df = load_data(recreate_data=RECREATE_DATA, max_income=INCOME_LIMIT, columns=APP_COLUMNS)
     df = transform_data(df)
     df_filtered = filter_data(df)
+    meta = summarize_data(df_filtered)
     
-    # Create and run the Dash application.
-    app = create_dash_app(df_filtered)
-    app.run_server(debug=True)
+    return create_dash_app(df_filtered, meta)
+
+def main():
+    # Create and run the Dash application with the development server; use
+    # wsgi.py to serve it with multiple gunicorn workers instead.
+    app = create_app()
+    app.run(debug=DEBUG, host=HOST, port=PORT)
 
 if __name__ == '__main__':
     main()
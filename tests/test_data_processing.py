@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from data_processing import read_records
+
+HEADER = '00ZHESTV HEADER 2025'
+FOOTER = '99ZHEND'
+
+def data_record(income):
+    """
+    Returns a 62-character tax rate record for the given income in Rappen.
+    """
+    return (
+        '0601ZH' + 'A0N'.ljust(10) + '20250101' + f'{income:09d}' + f'{100000:09d}'
+        + ' 00' + f'{0:09d}' + f'{income // 10000:05d}' + '   '
+    )
+
+RECORDS = [data_record(step * 100000) for step in range(3)]
+
+def write_lines(tmp_path, lines, trailing_newline=True):
+    """
+    Writes lines to a TXT file, optionally without a final line break.
+    """
+    path = tmp_path / 'tar25zh.txt'
+    path.write_text('\n'.join(lines) + ('\n' if trailing_newline else ''))
+    return path
+
+def expected_records(records):
+    """
+    Returns records as read_records returns them, line breaks included.
+    """
+    return np.array([list((record + '\n').encode()) for record in records], dtype=np.uint8)
+
+def test_read_records_skips_header_and_footer(tmp_path):
+    path = write_lines(tmp_path, [HEADER, *RECORDS, FOOTER])
+    np.testing.assert_array_equal(read_records(path), expected_records(RECORDS))
+
+def test_read_records_keeps_last_record_without_line_break(tmp_path):
+    path = write_lines(tmp_path, [HEADER, *RECORDS], trailing_newline=False)
+    np.testing.assert_array_equal(read_records(path), expected_records(RECORDS))
+
+def test_read_records_joins_runs_split_by_other_records(tmp_path):
+    lines = [HEADER, RECORDS[0], FOOTER, *RECORDS[1:]]
+    path = write_lines(tmp_path, lines, trailing_newline=False)
+    np.testing.assert_array_equal(read_records(path), expected_records(RECORDS))
+
+def test_read_records_rejects_inconsistent_record_lengths(tmp_path):
+    path = write_lines(tmp_path, [HEADER, *RECORDS, RECORDS[0][:-1], FOOTER])
+    with pytest.raises(ValueError):
+        read_records(path)
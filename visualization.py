@@ -1,12 +1,75 @@
 import numpy as np
 import plotly.graph_objects as go
 
-def create_base_figure(df_filtered, canton_names=None, x_min=0, x_max=30000, tarif_code='A0', church_tax='Y', num_children=0, translations=None):
+# Color definitions
+GREY75 = 'rgba(191, 191, 191, 0.8)'  # Light grey with transparency
+GREY40 = '#666666'
+GRID_COLOR = 'rgba(232, 232, 232, 1)'
+
+# Define consistent font
+FONT_FAMILY = 'Arial, Helvetica, sans-serif'
+
+# Color scale for highlighted cantons
+COLOR_SCALE = (
+    '#9A5CB4', '#3F8EFC', '#906C33', '#7B3A96', '#5D5D5D', 
+    '#3E8E75', '#5EFF5E', '#F0E68C', '#888888', '#4CA64C', 
+    '#A0522D', '#DDA0DD', '#FF00FF', '#000080', '#FFA500', 
+    '#FFC0CB', '#9ACD32', '#FF0000', '#40E0D0', '#48D1CC', 
+    '#8A2BE2', '#C71585', '#FF1493', '#8B0000', '#FFD32C', 
+    '#FF69B4'
+)
+
+# Hover text of the canton lines after the canton code; the code is part of
+# the template so no per-point text array has to be sent
+HOVER_TEMPLATE = "<br>Income: %{x:,.0f} CHF<br>Tax Rate: %{y:.2f}%<extra></extra>"
+
+# Number of grid line traces preceding the canton traces in the figure; each
+# canton then has a line and a connecting line trace
+GRID_TRACES = 1
+
+# Maximum number of points drawn per canton line; longer series are
+# downsampled to the lowest and highest rate per income bucket, which keeps
+# the plotted shape at screen resolution
+MAX_POINTS = 2000
+
+def downsample_minmax(x, y, n_out):
+    """
+    Downsamples a series to at most n_out points by keeping the lowest and
+    highest point of equal-sized buckets, in their original order, together
+    with the first and last point.
+    """
+    n = len(x)
+    n_buckets = (n_out - 2) // 2
+    if n <= n_out or n_buckets < 1:
+        return x, y
+    
+    # Pad y with its last value to fill the last bucket; padded positions
+    # map back to the last point.
+    size = -(-n // n_buckets)
+    buckets = np.pad(y, (0, n_buckets * size - n), mode='edge').reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    keep = np.unique(np.concatenate((
+        [0, n - 1],
+        np.minimum(offsets + buckets.argmin(axis=1), n - 1),
+        np.minimum(offsets + buckets.argmax(axis=1), n - 1)
+    )))
+    return x[keep], y[keep]
+
+def subtitle_texts(translations, x_min, x_max, tarif_code, church_tax, num_children):
+    """
+    Returns the subtitle and income range texts shown above the plot.
+    """
+    subtitle_text = f'<b>{translations["tarif_code"]}</b> {tarif_code}, <b>{translations["church_tax"]}</b> {church_tax}, <b>{translations["number_of_children"]}</b> {num_children}'
+    income_range_text = f'<b>{translations["income_range_text"]}:</b> {x_min:,}'.replace(',', "'") + f' - {x_max:,}'.replace(',', "'") + ' CHF'
+    return subtitle_text, income_range_text
+
+def create_base_figure(df_filtered, canton_names=None, x_min=0, x_max=30000, tarif_code='A0', church_tax='Y', num_children=0, translations=None, canton_colors=None):
     """
     Create an interactive line plot for canton source tax rates using Plotly.
     
     Args:
-        df_filtered (pd.DataFrame): Filtered DataFrame containing tax rate data
+        df_filtered (pd.DataFrame or dict): Tax rate data with 'kanton',
+            'steuerbares_einkommen' and 'steuer_prozent' columns
         canton_names (dict, optional): Mapping of canton codes to full names
         x_min (int): Minimum income value to display
         x_max (int): Maximum income value to display
@@ -14,6 +77,8 @@ def create_base_figure(df_filtered, canton_names=None, x_min=0, x_max=30000, tar
         church_tax: Selected church tax option
         num_children: Number of children
         translations: Dictionary of translations
+        canton_colors (dict, optional): Mapping of canton codes to highlight
+            colors; by default cantons cycle through COLOR_SCALE in order
     """
     # Use default English translations if none provided
     if translations is None:
@@ -27,85 +92,77 @@ def create_base_figure(df_filtered, canton_names=None, x_min=0, x_max=30000, tar
             'number_of_children': 'Number of Children'
         }
     
-    # Color definitions
-    GREY75 = 'rgba(191, 191, 191, 0.8)'  # Light grey with transparency
-    GREY40 = '#666666'
+    # Work on plain column arrays so the per-canton loops below index
+    # contiguous NumPy data instead of filtering a DataFrame.
+    kanton = np.asarray(df_filtered['kanton'])
+    income = np.asarray(df_filtered['steuerbares_einkommen'])
+    rate = np.asarray(df_filtered['steuer_prozent'])
     
-    # Define consistent font
-    font_family = 'Arial, Helvetica, sans-serif'
+    # Group the rows by canton, with the cantons sorted (for data mapping)
+    # and income sorted within each group so the visible range can be found
+    # by binary search. Rows already in that order, like the app's
+    # precomputed slices, are used as they are.
+    same_canton = kanton[1:] == kanton[:-1]
+    if not ((kanton[1:] >= kanton[:-1]).all() and (income[1:] >= income[:-1])[same_canton].all()):
+        _, canton_codes = np.unique(kanton, return_inverse=True)
+        order = np.lexsort((income, canton_codes.ravel()))
+        kanton, income, rate = kanton[order], income[order], rate[order]
+        same_canton = kanton[1:] == kanton[:-1]
+    starts = np.flatnonzero(np.r_[True, ~same_canton])
+    bounds = np.r_[starts[1:], len(kanton)]
+    cantons = kanton[starts].tolist()
+    canton_data = {
+        canton: (income[start:end], rate[start:end])
+        for canton, start, end in zip(cantons, starts, bounds)
+    }
     
-    # Color scale for highlighted cantons
-    COLOR_SCALE = [
-        '#9A5CB4', '#3F8EFC', '#906C33', '#7B3A96', '#5D5D5D', 
-        '#3E8E75', '#5EFF5E', '#F0E68C', '#888888', '#4CA64C', 
-        '#A0522D', '#DDA0DD', '#FF00FF', '#000080', '#FFA500', 
-        '#FFC0CB', '#9ACD32', '#FF0000', '#40E0D0', '#48D1CC', 
-        '#8A2BE2', '#C71585', '#FF1493', '#8B0000', '#FFD32C', 
-        '#FF69B4'
-    ]
+    # Slice bounds of the rows shown for each canton, in canton order. Lines
+    # extend slightly beyond x_min and x_max to ensure they touch the boundaries.
+    visible_start = np.array([
+        np.searchsorted(canton_income, x_min - 1, side='left')
+        for canton_income, _ in canton_data.values()
+    ], dtype=np.int64)
+    visible_end = np.array([
+        np.searchsorted(canton_income, x_max + 1, side='right')
+        for canton_income, _ in canton_data.values()
+    ], dtype=np.int64)
     
     # If no canton names provided, use the codes
     if canton_names is None:
-        canton_names = {canton: canton for canton in df_filtered['kanton'].unique()}
-
-    # Create figure
-    fig = go.Figure()
+        canton_names = {canton: canton for canton in cantons}
+    if canton_colors is None:
+        canton_colors = {}
 
     # Calculate y range based on the selected income range
-    income_filtered_df = df_filtered[
-        (df_filtered['steuerbares_einkommen'] >= x_min) & 
-        (df_filtered['steuerbares_einkommen'] <= x_max)
-    ]
+    in_range = (income >= x_min) & (income <= x_max)
     
-    if len(income_filtered_df) > 0:
-        y_max = income_filtered_df['steuer_prozent'].max()
-        y_min = income_filtered_df['steuer_prozent'].min()
+    if in_range.any():
+        y_max = rate[in_range].max()
+        y_min = rate[in_range].min()
     else:
         # Fallback if no data in range
-        y_max = df_filtered['steuer_prozent'].max()
-        y_min = df_filtered['steuer_prozent'].min()
-    
-    # Create sorted list of cantons (for data mapping)
-    cantons = sorted(df_filtered['kanton'].unique())
-    canton_to_idx = {canton: idx for idx, canton in enumerate(cantons)}
-
-    # Create display points (for visual layout)
-    display_points = []
-    for canton in cantons:
-        data = df_filtered[df_filtered['kanton'] == canton]
-        # Get the last data point before or at x_max + 1 (to match our extended data lines)
-        data_filtered = data[data['steuerbares_einkommen'] <= x_max + 1]
-        if len(data_filtered) > 0:
-            y_val = data_filtered['steuer_prozent'].iloc[-1]
-            x_val = data_filtered['steuerbares_einkommen'].iloc[-1]
-        else:
-            # Fallback if no data points below x_max + 1
-            y_val = data['steuer_prozent'].iloc[0]
-            x_val = data['steuerbares_einkommen'].iloc[0]
-            
-        display_points.append({
-            'canton': canton,
-            'y_start': y_val,
-            'x_last': x_val,
-            'idx': canton_to_idx[canton]
-        })
+        y_max = rate.max()
+        y_min = rate.min()
 
-    # Sort by y_start value
-    display_points.sort(key=lambda x: x['y_start'])
+    # Create display points (for visual layout) as one array per field, in
+    # canton order. Each line ends at its last row before or at x_max + 1 (to
+    # match our extended data lines), or at its first row if there is none.
+    last_rows = starts + np.maximum(visible_end - 1, 0)
+    x_last = income[last_rows]
+    y_start = rate[last_rows]
 
     # Define label positions with more padding at top and bottom
     # Use 90% of the available space, leaving 5% padding at top and bottom
     y_range = y_max * 1.15 - y_min * 0.85
     padding = 0.05 * y_range
-    y_positions = np.linspace(
+    
+    # Assign the positions to the labels in the order of their y_start value
+    y_end = np.empty(len(cantons))
+    y_end[np.argsort(y_start, kind='stable')] = np.linspace(
         y_min * 0.85 + padding,  # Add padding at bottom
         y_max * 1.15 - padding,  # Subtract padding at top
-        len(display_points)
+        len(cantons)
     )
-    
-    # Assign positions to display points
-    for i, point in enumerate(display_points):
-        point['y_end'] = y_positions[i]
 
     # Define x-coordinates for the connecting lines with a larger gap
     x_start = x_max  # End of data
@@ -117,125 +174,74 @@ def create_base_figure(df_filtered, canton_names=None, x_min=0, x_max=30000, tar
     x_tick_values = np.linspace(x_min, x_max, 6)  # Reduce from 5 to 6 evenly spaced ticks
     y_tick_values = np.linspace(y_min * 0.85, y_max * 1.15, 5)  # Reduce from 10 to 5 ticks
 
-    # Create custom grid lines that align with ticks
-    x_grid_lines = []
-    for x in x_tick_values:
-        x_grid_lines.append(
-            dict(
-                type="line",
-                x0=x,
-                y0=y_min * 0.85 - padding,
-                x1=x,
-                y1=y_max * 1.15 + padding,
-                line=dict(
-                    color="rgba(232, 232, 232, 1)",
-                    width=1
-                ),
-                layer="below"  # Explicitly set to appear below traces
-            )
-        )
+    # Vertical grid lines are the x axis grid at the tick values; the last
+    # one at x_max also separates the grid from the labels. Horizontal grid
+    # lines must stop at x_max, so they are one polyline with NaN gaps
+    # between the segments.
+    y_grid_x = np.tile([x_min, x_max, np.nan], len(y_tick_values))
+    y_grid_y = np.repeat(y_tick_values, 3)
+    y_grid_y[2::3] = np.nan
 
-    y_grid_lines = []
-    for y in y_tick_values:
-        y_grid_lines.append(
-            dict(
-                type="line",
-                x0=x_min,  # Start at x_min
-                y0=y,
-                x1=x_max,  # Stop at x_max
-                y1=y,
-                line=dict(
-                    color="rgba(232, 232, 232, 1)",
-                    width=1
-                ),
-                layer="below"  # Explicitly set to appear below traces
-            )
-        )
-
-    # Calculate the maximum label length to set appropriate right margin
-    max_label_length = max([len(canton_names.get(canton, canton)) for canton in cantons])
+    # Look up the canton labels once, and calculate the maximum label length
+    # to set appropriate right margin
+    canton_labels = [canton_names.get(canton, canton) for canton in cantons]
+    max_label_length = max(map(len, canton_labels))
     right_margin = max_label_length + 20  # Reduced multiplier and base value
     
-    # Create figure with grid lines in the layout
-    fig = go.Figure(layout=dict(
-        shapes=x_grid_lines + y_grid_lines + [
-            # Add a vertical line at x_max to visually separate the grid from the labels
-            dict(
-                type="line",
-                x0=x_max,
-                y0=y_min * 0.85 - padding,
-                x1=x_max,
-                y1=y_max * 1.15 + padding,
-                line=dict(
-                    color="rgba(232, 232, 232, 1)",
-                    width=1
-                ),
-                layer="below"  # Explicitly set to appear below traces
-            )
-        ]
-    ))
+    # Collect the traces and canton labels first and add them to the figure
+    # in one call each, starting with the horizontal grid lines so they are
+    # drawn below the data
+    traces = [
+        go.Scattergl(
+            x=y_grid_x,
+            y=y_grid_y,
+            mode='lines',
+            line=dict(
+                color=GRID_COLOR,
+                width=1
+            ),
+            hoverinfo='skip',
+            showlegend=False
+        )
+    ]
+    annotations = []
     
     # Now add all the data traces
     # Create traces in alphabetical order (for correct mapping)
-    for canton in cantons:
-        idx = canton_to_idx[canton]
-        data = df_filtered[df_filtered['kanton'] == canton]
+    for idx, canton in enumerate(cantons):
+        canton_income, canton_rate = canton_data[canton]
         
-        # Find the display point for this canton
-        display_point = next(p for p in display_points if p['canton'] == canton)
+        # Downsample the visible slice of the line
+        start, end = visible_start[idx], visible_end[idx]
+        x_values, y_values = downsample_minmax(canton_income[start:end], canton_rate[start:end], MAX_POINTS)
         
-        # Main line (grey) - extend slightly beyond x_min and x_max to ensure lines touch the boundaries
-        fig.add_trace(
-            go.Scatter(
-                x=data[(data['steuerbares_einkommen'] >= x_min - 1) & 
-                       (data['steuerbares_einkommen'] <= x_max + 1)]['steuerbares_einkommen'],
-                y=data[(data['steuerbares_einkommen'] >= x_min - 1) & 
-                       (data['steuerbares_einkommen'] <= x_max + 1)]['steuer_prozent'],
+        # Canton line, drawn grey with WebGL and left out of hover picking;
+        # highlighting recolors it with the canton color carried in meta and
+        # enables its hover
+        traces.append(
+            go.Scattergl(
+                x=x_values,
+                y=y_values,
                 name=canton,
+                meta=canton_colors.get(canton, COLOR_SCALE[idx % len(COLOR_SCALE)]),
                 line=dict(
                     color=GREY75,
                     width=1.5,
                     shape='linear'  # Ensure linear interpolation between points
                 ),
                 connectgaps=True,  # Connect any gaps in the data
-                hovertemplate="Canton: %{text}<br>Income: %{x:,.0f} CHF<br>Tax Rate: %{y:.2f}%<extra></extra>",
-                text=[canton] * len(data[(data['steuerbares_einkommen'] >= x_min - 1) & 
-                                        (data['steuerbares_einkommen'] <= x_max + 1)]),
-                legendgroup=canton,
-                mode='lines',
-                visible=True
-            )
-        )
-        
-        # Colored version of the line (initially hidden) - extend slightly beyond x_min and x_max
-        fig.add_trace(
-            go.Scatter(
-                x=data[(data['steuerbares_einkommen'] >= x_min - 1) & 
-                       (data['steuerbares_einkommen'] <= x_max + 1)]['steuerbares_einkommen'],
-                y=data[(data['steuerbares_einkommen'] >= x_min - 1) & 
-                       (data['steuerbares_einkommen'] <= x_max + 1)]['steuer_prozent'],
-                name=canton + "_colored",
-                line=dict(
-                    color=COLOR_SCALE[idx % len(COLOR_SCALE)],
-                    width=2,
-                    shape='linear'  # Ensure linear interpolation between points
-                ),
-                connectgaps=True,  # Connect any gaps in the data
-                hovertemplate="Canton: %{text}<br>Income: %{x:,.0f} CHF<br>Tax Rate: %{y:.2f}%<extra></extra>",
-                text=[canton] * len(data[(data['steuerbares_einkommen'] >= x_min - 1) & 
-                                        (data['steuerbares_einkommen'] <= x_max + 1)]),
+                hovertemplate="Canton: " + canton + HOVER_TEMPLATE,
+                hoverinfo='skip',
                 legendgroup=canton,
-                mode='lines',
-                visible=False,
-                showlegend=False
+                mode='lines'
             )
         )
         
         # Add connecting line with three points (like in the example)
-        fig.add_trace(
+        traces.append(
             go.Scatter(
-                x=[display_point['x_last'], x_mid, x_end],
-                y=[display_point['y_start'], display_point['y_end'], display_point['y_end']],
+                x=[x_last[idx], x_mid, x_end],
+                y=[y_start[idx], y_end[idx], y_end[idx]],
                 mode='lines',
                 line=dict(
                     color=GREY75,
@@ -249,51 +255,60 @@ def create_base_figure(df_filtered, canton_names=None, x_min=0, x_max=30000, tar
         )
         
         # Add annotation for label instead of scatter text
-        fig.add_annotation(
-            x=x_label,
-            y=display_point['y_end'],
-            text=canton_names.get(canton, canton),
-            showarrow=False,
-            font=dict(
-                color=GREY40,
-                size=10,
-                family=font_family
-            ),
-            xanchor='left',  # Explicitly set left alignment
-            yanchor='middle'
+        annotations.append(
+            dict(
+                x=x_label,
+                y=y_end[idx],
+                text=canton_labels[idx],
+                showarrow=False,
+                font=dict(
+                    color=GREY40,
+                    size=10,
+                    family=FONT_FAMILY
+                ),
+                xanchor='left',  # Explicitly set left alignment
+                yanchor='middle'
+            )
         )
+    
+    # Create figure
+    fig = go.Figure()
+    fig.add_traces(traces)
 
     # Update layout (without adding shapes here)
     fig.update_layout(
+        annotations=annotations,
         plot_bgcolor='white',
         paper_bgcolor='white',
         title=dict(
             text=f'<b>{translations["source_tax_progression"]}</b>',
             x=0.5,
-            font=dict(size=18, color='black', family=font_family, weight='bold')
+            font=dict(size=18, color='black', family=FONT_FAMILY, weight='bold')
         ),
         xaxis=dict(
             title=dict(
                 text=translations["monthly_income"],
-                font=dict(size=12, color='black', family=font_family)
+                font=dict(size=12, color='black', family=FONT_FAMILY)
             ),
-            showgrid=False,  # Disable default grid
+            showgrid=True,  # Grid lines at the tick values
+            gridcolor=GRID_COLOR,
+            gridwidth=1,
             zeroline=False,
             tickformat=',d',
             range=[x_min * 0.95, x_max * 1.22],  # Start from x_min with a small buffer
-            tickfont=dict(family=font_family, color='black'),
+            tickfont=dict(family=FONT_FAMILY, color='black'),
             tickvals=x_tick_values,
             ticktext=[f"{int(val):,}".replace(',', "'") + " CHF" for val in x_tick_values]
         ),
         yaxis=dict(
             title=dict(
                 text=translations["tax_rate"],
-                font=dict(size=12, color='black', family=font_family)
+                font=dict(size=12, color='black', family=FONT_FAMILY)
             ),
             showgrid=False,  # Disable default grid
             zeroline=False,
             range=[y_min * 0.85 - padding, y_max * 1.15 + padding],  # Add extra padding
-            tickfont=dict(family=font_family, color='black'),
+            tickfont=dict(family=FONT_FAMILY, color='black'),
             tickvals=y_tick_values,
             ticktext=[f'{val:.1f}%' for val in y_tick_values],  # Add % symbol to tick labels
             ticksuffix=''  # Remove default ticksuffix since we added % to each label
@@ -301,12 +316,17 @@ def create_base_figure(df_filtered, canton_names=None, x_min=0, x_max=30000, tar
         showlegend=False,
         hovermode='closest',
         margin=dict(t=130, l=50, r=right_margin, b=50),  # Increased top margin for subtitle
-        font=dict(family=font_family),
-        autosize=True  # Enable autosize for responsive behavior
+        font=dict(family=FONT_FAMILY),
+        autosize=True,  # Enable autosize for responsive behavior
+        # Keep the user's zoom and pan while only the tariff, church tax,
+        # children or highlighting change; a new income range resets them
+        uirevision=f'{x_min}-{x_max}'
     )
     
     # Add subtitle with tariff code, church tax, and number of children
-    subtitle_text = f'<b>{translations["tarif_code"]}</b> {tarif_code}, <b>{translations["church_tax"]}</b> {church_tax}, <b>{translations["number_of_children"]}</b> {num_children}'
+    subtitle_text, income_range_text = subtitle_texts(
+        translations, x_min, x_max, tarif_code, church_tax, num_children
+    )
     
     fig.add_annotation(
         x=0.5,
@@ -315,7 +335,7 @@ def create_base_figure(df_filtered, canton_names=None, x_min=0, x_max=30000, tar
         yref='paper',
         text=subtitle_text,
         showarrow=False,
-        font=dict(size=14, color='black', family=font_family),
+        font=dict(size=14, color='black', family=FONT_FAMILY),
         align='center'
     )
     
@@ -325,9 +345,9 @@ def create_base_figure(df_filtered, canton_names=None, x_min=0, x_max=30000, tar
         y=1.01,
         xref='paper',
         yref='paper',
-        text=f'<b>{translations["income_range_text"]}:</b> {x_min:,}'.replace(',', "'") + f' - {x_max:,}'.replace(',', "'") + ' CHF',
+        text=income_range_text,
         showarrow=False,
-        font=dict(size=14, color='black', family=font_family),
+        font=dict(size=14, color='black', family=FONT_FAMILY),
         align='center'
     )
     
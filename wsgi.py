@@ -0,0 +1,9 @@
+# WSGI entry point for production serving, e.g.
+#   gunicorn --preload --workers=$(nproc) --threads=2 wsgi:server
+# --preload loads the data once before the workers are forked, so they
+# share it; without it each worker loads the data itself, and the first
+# one to start rebuilds the cleaned data while the others wait.
+from main import create_app
+
+app = create_app()
+server = app.server